@@ -8,7 +8,8 @@ start_snort_connector() {
     mkdir -p /app/snort_logs
     
     # Start the connector with specified parameters
-    python /app/tools/snort_connector.py --log-path "$SNORT_LOG_PATH" --api-url "$API_URL" $BATCH_MODE --poll-interval "$POLL_INTERVAL"
+    # exec so the connector is PID 1 and receives SIGTERM from docker stop
+    exec python /app/tools/snort_connector.py --log-path "$SNORT_LOG_PATH" --api-url "$API_URL" $BATCH_MODE --poll-interval "$POLL_INTERVAL"
 }
 
 # Check if we should run the Snort connector instead of the web app
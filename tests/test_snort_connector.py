@@ -0,0 +1,104 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+
+from snort_connector import SnortAlert, SnortLogWatcher
+
+ALERT = (
+    "[**] [1:1000001:1] SQL Injection Attempt [**]\n"
+    "[Classification: Web Application Attack] [Priority: 1]\n"
+    "03/10-12:00:00.123456 203.0.113.5:4444 -> 10.0.0.1:80\n"
+    "TCP TTL:64 TOS:0x0 ID:1 IpLen:20 DgmLen:40\n"
+)
+OTHER_ALERT = ALERT.replace("203.0.113.5", "198.51.100.7")
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = tmp_path / "alert"
+    path.touch()
+    return path
+
+
+@pytest.fixture
+def watcher(log_path, tmp_path):
+    watcher = SnortLogWatcher(str(log_path), "http://localhost:8000/api/v1/threats/analyze",
+                              db_path=str(tmp_path / "threats.db"), parse_workers=1)
+    watcher.sent = []
+    watcher.submit_alert = watcher.sent.append
+    yield watcher
+    watcher.close()
+
+
+def append(path, data, mode="a"):
+    with open(path, mode) as f:
+        f.write(data)
+
+
+def sent_sources(watcher):
+    return [threat["source_ip"] for threat in watcher.sent]
+
+
+def test_alert_split_across_idle_poll(watcher, log_path):
+    append(log_path, ALERT[:60])
+    watcher.process_new_alerts()
+    watcher.process_new_alerts()  # Idle poll while the alert is half written
+    assert watcher.sent == []
+
+    append(log_path, ALERT[60:])
+    watcher.process_new_alerts()
+    watcher.process_new_alerts()  # Idle poll flushes the now complete alert
+    assert sent_sources(watcher) == ["203.0.113.5"]
+
+
+def test_alerts_without_blank_line_in_one_read(watcher, log_path):
+    append(log_path, ALERT + OTHER_ALERT + "\n")
+    watcher.process_new_alerts()
+    assert sent_sources(watcher) == ["203.0.113.5", "198.51.100.7"]
+
+
+def test_crlf_log(watcher, log_path):
+    with open(log_path, "wb") as f:
+        f.write(((ALERT + "\n") * 5).replace("\n", "\r\n").encode())
+    watcher.process_new_alerts()
+    assert sent_sources(watcher) == ["203.0.113.5"] * 5
+
+
+def test_log_rotation(watcher, log_path):
+    append(log_path, ALERT + "\n")
+    watcher.process_new_alerts()
+
+    os.rename(log_path, str(log_path) + ".1")
+    append(log_path, OTHER_ALERT + "\n")
+    watcher.process_new_alerts()
+    assert sent_sources(watcher) == ["203.0.113.5", "198.51.100.7"]
+
+
+def test_log_truncation(watcher, log_path):
+    append(log_path, ALERT + "\n" + ALERT + "\n")
+    watcher.process_new_alerts()
+
+    append(log_path, OTHER_ALERT + "\n", mode="w")
+    watcher.process_new_alerts()
+    assert sent_sources(watcher) == ["203.0.113.5", "203.0.113.5", "198.51.100.7"]
+
+
+@pytest.mark.parametrize("entry", [
+    ALERT,
+    "  " + ALERT,
+    ALERT.replace("[Classification: Web Application Attack] [Priority: 1]\n", ""),
+    ALERT.replace("SQL Injection Attempt [**]", "SQL Injection Attempt"),
+    "[**] [1:2:3] Port Scan [**]\n[Classification: Attempted Recon] [Priority: 2] [Xref]\n"
+    "03/10-12:00:01.5 192.0.2.1:53 -> 10.0.0.2:53",
+])
+def test_fast_parser_matches_line_parser(entry):
+    fast = SnortAlert(entry)
+    slow = SnortAlert("")
+    slow._parse_lines(entry)
+
+    fields = ("signature", "signature_id", "signature_rev", "classification", "priority",
+              "timestamp", "source_ip", "source_port", "dest_ip", "dest_port")
+    assert [getattr(fast, field) for field in fields] == [getattr(slow, field) for field in fields]
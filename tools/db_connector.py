@@ -7,15 +7,27 @@ from the Snort IDS connector.
 """
 
 import os
-import json
 import sqlite3
 import logging
 import time
-from typing import List, Dict, Any, Optional, Tuple
+import uuid
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from datetime import datetime
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+
+def _json_dumps(obj: Any) -> str:
+    """Serialize a value for a TEXT column using orjson
+    
+    orjson writes compact separators, so rows stored before the switch from
+    json.dumps (", " and ": ") differ byte-for-byte but decode to equal values.
+    """
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 class DatabaseConnector:
     """Handles database interactions for the Snort connector"""
     
@@ -93,6 +105,11 @@ class DatabaseConnector:
             if 'conn' in locals():
                 conn.close()
     
+    @staticmethod
+    def generate_threat_id() -> str:
+        """Generate a unique ID for a new threat"""
+        return f"threat_{int(time.time())}_{uuid.uuid4().hex[:12]}"
+    
     def _get_connection(self) -> sqlite3.Connection:
         """Get a database connection with retry logic"""
         max_retries = 3
@@ -154,7 +171,7 @@ class DatabaseConnector:
                     threat_data.get('protocol', ''),
                     threat_data.get('behavior', ''),
                     threat_data.get('timestamp', ''),
-                    json.dumps(threat_data.get('additional_data', {})),
+                    _json_dumps(threat_data.get('additional_data', {})),
                     threat_data.get('id')
                 ))
             else:
@@ -173,7 +190,7 @@ class DatabaseConnector:
                     threat_data.get('behavior', ''),
                     threat_data.get('timestamp', ''),
                     creation_time,
-                    json.dumps(threat_data.get('additional_data', {}))
+                    _json_dumps(threat_data.get('additional_data', {}))
                 ))
                 
             conn.commit()
@@ -207,7 +224,7 @@ class DatabaseConnector:
             for threat_data in threat_batch:
                 # Generate a unique ID if not provided
                 if 'id' not in threat_data:
-                    threat_data['id'] = f"threat_{int(time.time())}_{hash(threat_data['source_ip'])}"
+                    threat_data['id'] = self.generate_threat_id()
                 
                 # Prepare data for insertion
                 threat_id = threat_data['id']
@@ -220,7 +237,7 @@ class DatabaseConnector:
                 creation_time = datetime.now().isoformat()
                 
                 # Convert additional_data to JSON string
-                additional_data = json.dumps(threat_data.get('additional_data', {}))
+                additional_data = _json_dumps(threat_data.get('additional_data', {}))
                 
                 # Insert the threat
                 cursor.execute('''
@@ -263,7 +280,7 @@ class DatabaseConnector:
                 UPDATE threats 
                 SET submitted = 1, submission_time = ?, api_response = ?
                 WHERE id = ?
-                ''', (submission_time, json.dumps(api_response), threat_id))
+                ''', (submission_time, _json_dumps(api_response), threat_id))
             
             # Log the submission attempt
             cursor.execute('''
@@ -281,6 +298,48 @@ class DatabaseConnector:
             if 'conn' in locals():
                 conn.close()
     
+    def mark_batch_as_submitted(self, submissions: List[Tuple[str, bool, Optional[Dict[str, Any]], Optional[str]]]) -> None:
+        """
+        Record several submission results in a single transaction
+        
+        Args:
+            submissions: (threat_id, success, api_response, error_message) tuples,
+                as accepted by mark_as_submitted
+        """
+        if not submissions:
+            return
+            
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            
+            submission_time = datetime.now().isoformat()
+            
+            # Update the records of successful submissions
+            cursor.executemany('''
+            UPDATE threats 
+            SET submitted = 1, submission_time = ?, api_response = ?
+            WHERE id = ?
+            ''', [(submission_time, _json_dumps(api_response), threat_id)
+                  for threat_id, success, api_response, _ in submissions if success])
+            
+            # Log the submission attempts
+            cursor.executemany('''
+            INSERT INTO submission_attempts 
+            (threat_id, attempt_time, success, error_message)
+            VALUES (?, ?, ?, ?)
+            ''', [(threat_id, submission_time, 1 if success else 0, error_message)
+                  for threat_id, success, _, error_message in submissions])
+            
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Error marking {len(submissions)} threats as submitted: {str(e)}")
+            if 'conn' in locals():
+                conn.rollback()
+        finally:
+            if 'conn' in locals():
+                conn.close()
+    
     def get_unsent_threats(self, limit: int = 50) -> List[Dict[str, Any]]:
         """
         Get threats that have not been successfully submitted
@@ -309,13 +368,13 @@ class DatabaseConnector:
                 threat = dict(row)
                 # Parse additional_data from JSON
                 if threat['additional_data']:
-                    threat['additional_data'] = json.loads(threat['additional_data'])
+                    threat['additional_data'] = orjson.loads(threat['additional_data'])
                 else:
                     threat['additional_data'] = {}
                     
                 # Parse API response from JSON if present
                 if threat.get('api_response'):
-                    threat['api_response'] = json.loads(threat['api_response'])
+                    threat['api_response'] = orjson.loads(threat['api_response'])
                 
                 threats.append(threat)
             
@@ -327,6 +386,66 @@ class DatabaseConnector:
             if 'conn' in locals():
                 conn.close()
     
+    def iter_unsent_threats(self, batch_size: int = 50) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Iterate over all unsent threats in pages of at most batch_size
+        
+        Each page is fetched by its own query keyed on (creation_time, id), so
+        memory stays bounded by the page size and no read lock is held while
+        the caller processes (and updates) a page.
+        
+        Args:
+            batch_size: Maximum number of threats per page
+            
+        Yields:
+            Lists of unsent threat dictionaries
+        """
+        last_key = ('', '')
+        while True:
+            try:
+                conn = self._get_connection()
+                cursor = conn.cursor()
+                cursor.arraysize = batch_size
+                
+                cursor.execute('''
+                SELECT * FROM threats
+                WHERE submitted = 0 AND (creation_time, id) > (?, ?)
+                ORDER BY creation_time ASC, id ASC
+                LIMIT ?
+                ''', (*last_key, batch_size))
+                
+                rows = cursor.fetchmany()
+            except Exception as e:
+                logger.error(f"Error retrieving unsent threats: {str(e)}")
+                return
+            finally:
+                if 'conn' in locals():
+                    conn.close()
+            
+            if not rows:
+                return
+            
+            threats = []
+            for row in rows:
+                threat = dict(row)
+                # Parse additional_data from JSON
+                if threat['additional_data']:
+                    threat['additional_data'] = orjson.loads(threat['additional_data'])
+                else:
+                    threat['additional_data'] = {}
+                    
+                # Parse API response from JSON if present
+                if threat.get('api_response'):
+                    threat['api_response'] = orjson.loads(threat['api_response'])
+                
+                threats.append(threat)
+            
+            yield threats
+            
+            if len(rows) < batch_size:
+                return
+            last_key = (rows[-1]['creation_time'], rows[-1]['id'])
+    
     def get_threat_by_id(self, threat_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a threat by its ID
@@ -351,13 +470,13 @@ class DatabaseConnector:
                 threat = dict(row)
                 # Parse additional_data from JSON
                 if threat['additional_data']:
-                    threat['additional_data'] = json.loads(threat['additional_data'])
+                    threat['additional_data'] = orjson.loads(threat['additional_data'])
                 else:
                     threat['additional_data'] = {}
                     
                 # Parse API response from JSON if present
                 if threat.get('api_response'):
-                    threat['api_response'] = json.loads(threat['api_response'])
+                    threat['api_response'] = orjson.loads(threat['api_response'])
                     
                 return threat
             return None
@@ -395,13 +514,13 @@ class DatabaseConnector:
                 threat = dict(row)
                 # Parse additional_data from JSON
                 if threat['additional_data']:
-                    threat['additional_data'] = json.loads(threat['additional_data'])
+                    threat['additional_data'] = orjson.loads(threat['additional_data'])
                 else:
                     threat['additional_data'] = {}
                     
                 # Parse API response from JSON if present
                 if threat.get('api_response'):
-                    threat['api_response'] = json.loads(threat['api_response'])
+                    threat['api_response'] = orjson.loads(threat['api_response'])
                 
                 threats.append(threat)
             
@@ -542,23 +661,23 @@ class DatabaseConnector:
             severity = classification.get('severity', '') if classification else ''
             confidence = classification.get('confidence', 0) if classification else 0
             is_anomaly = ai_analysis.get('is_anomaly', False)
-            similar_threats = json.dumps(ai_analysis.get('similar_threats', []))
+            similar_threats = _json_dumps(ai_analysis.get('similar_threats', []))
             recommended_actions = ai_analysis.get('mitigation', '')
             
             # Get content safety results if available
             content_safety = ai_analysis.get('content_analysis', {})
-            content_safety_result = json.dumps(content_safety) if content_safety else None
+            content_safety_result = _json_dumps(content_safety) if content_safety else None
             
             # Extract detected URLs
             urls_detected = None
             if content_safety and 'detected_urls' in content_safety:
-                urls_detected = json.dumps(content_safety['detected_urls'])
+                urls_detected = _json_dumps(content_safety['detected_urls'])
             
             # Store full AI analysis as JSON
-            ai_analysis_json = json.dumps(ai_analysis)
+            ai_analysis_json = _json_dumps(ai_analysis)
             
             # Get classification info
-            threat_classification = json.dumps(classification) if classification else None
+            threat_classification = _json_dumps(classification) if classification else None
             
             # Current time for the analysis timestamp
             analysis_time = datetime.utcnow().isoformat()
@@ -647,10 +766,10 @@ class DatabaseConnector:
             
             # Add AI analysis if available
             if row[11]:  # ai_analysis
-                threat['ai_analysis'] = json.loads(row[11])
+                threat['ai_analysis'] = orjson.loads(row[11])
                 
             if row[12]:  # threat_classification
-                threat['threat_classification'] = json.loads(row[12])
+                threat['threat_classification'] = orjson.loads(row[12])
                 
             if row[13]:  # severity
                 threat['severity'] = row[13]
@@ -661,16 +780,16 @@ class DatabaseConnector:
             threat['is_anomaly'] = bool(row[15])
             
             if row[16]:  # similar_threats
-                threat['similar_threats'] = json.loads(row[16])
+                threat['similar_threats'] = orjson.loads(row[16])
                 
             if row[17]:  # recommended_actions
                 threat['recommended_actions'] = row[17]
                 
             if row[18]:  # content_safety_result
-                threat['content_safety_result'] = json.loads(row[18])
+                threat['content_safety_result'] = orjson.loads(row[18])
                 
             if row[19]:  # urls_detected
-                threat['urls_detected'] = json.loads(row[19])
+                threat['urls_detected'] = orjson.loads(row[19])
                 
             if row[20]:  # last_ai_analysis_time
                 threat['last_ai_analysis_time'] = row[20]
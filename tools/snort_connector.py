@@ -8,48 +8,68 @@ It now includes Azure AI integration for advanced threat analysis.
 """
 
 import argparse
-import json
 import os
+import queue
+import zlib
 import re
+import signal
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 import time
-import traceback
 import datetime
 import logging
-from threading import Thread
+import multiprocessing
+from functools import lru_cache
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from threading import BoundedSemaphore, Event, Thread
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileModifiedEvent
+from dotenv import dotenv_values
 from db_connector import DatabaseConnector
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("snort_connector.log"),
-        logging.StreamHandler()
-    ]
-)
+# Logging is configured in main(), so importing this module (as parse worker
+# processes do) has no side effects
 logger = logging.getLogger(__name__)
 
-# Try to import Azure AI services
+# Try to import the Rust-backed watchfiles notifier used by --watch
 try:
-    from app.models.ai.azure.ai_service_manager import AzureAIServiceManager
-    AZURE_AI_AVAILABLE = True
-    logger.info("Azure AI services imported successfully")
+    import watchfiles
+    WATCHFILES_AVAILABLE = True
+except ImportError:
+    WATCHFILES_AVAILABLE = False
+
+# Try to import Hyperscan, the preferred signature matcher
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Try to import the Aho-Corasick automaton used when Hyperscan is missing
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
 except ImportError:
-    AZURE_AI_AVAILABLE = False
-    logger.warning("Azure AI services not available - continuing without AI enhancement")
+    AHOCORASICK_AVAILABLE = False
+
+
+@lru_cache(maxsize=None)
+def azure_ai_service_manager():
+    """Import Azure AI services on first use, returning the manager class or None"""
+    try:
+        from app.models.ai.azure.ai_service_manager import AzureAIServiceManager
+    except ImportError:
+        logger.warning("Azure AI services not available - continuing without AI enhancement")
+        return None
+    logger.info("Azure AI services imported successfully")
+    return AzureAIServiceManager
 
 # Load environment variables if .env exists
 env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env')
 if os.path.exists(env_path):
-    with open(env_path, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#'):
-                key, value = line.split('=', 1)
-                os.environ[key] = value
+    os.environ.update({key: value for key, value in dotenv_values(env_path).items() if value is not None})
 
 # Default configuration
 DEFAULT_CONFIG = {
@@ -62,7 +82,53 @@ DEFAULT_CONFIG = {
     "retry_unsent": os.environ.get("RETRY_UNSENT", "False").lower() in ('true', '1', 't'),
     "retry_interval": int(os.environ.get("RETRY_INTERVAL", "60")),
     "retry_limit": int(os.environ.get("RETRY_LIMIT", "3")),
-    "use_ai": os.environ.get("USE_AZURE_AI", "False").lower() in ('true', '1', 't')
+    "use_ai": os.environ.get("USE_AZURE_AI", "False").lower() in ('true', '1', 't'),
+    "parse_workers": int(os.environ.get("PARSE_WORKERS", "1")),
+    "compress_batches": os.environ.get("COMPRESS_BATCHES", "False").lower() in ('true', '1', 't')
+}
+
+# Database writes are handed to a writer thread through a bounded queue and
+# applied in groups of up to DB_WRITE_BATCH operations
+DB_QUEUE_SIZE = 1024
+DB_WRITE_BATCH = 256
+
+# Maximum number of bytes read from the alert log per pread call
+READ_CHUNK_SIZE = 1 << 20
+
+# An unterminated alert at the end of the log is held back until it parses as
+# complete; past this age in seconds or this size it is flushed regardless
+PARTIAL_ALERT_MAX_AGE = 60
+PARTIAL_ALERT_MAX_BYTES = 1 << 20
+
+# With parse workers enabled, bursts smaller than this are still parsed
+# inline to avoid pickling small batches to the pool
+PARALLEL_PARSE_THRESHOLD = 256
+PARSE_CHUNKSIZE = 64
+
+# Individual alerts are sent from a small thread pool so HTTP round trips
+# overlap with parsing; submitters block once this many sends are in flight
+SEND_WORKERS = 8
+MAX_IN_FLIGHT_SENDS = 32
+
+# (connect, read) timeouts in seconds for API requests
+HTTP_TIMEOUT = (3, 10)
+
+# Headers for pre-serialized JSON request bodies
+JSON_HEADERS = {"Content-Type": "application/json"}
+GZIP_JSON_HEADERS = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+
+# Alert JSON is highly repetitive, so the fastest level already shrinks it
+# several times over at a fraction of the cost of the default level
+GZIP_LEVEL = 1
+
+# Protocol inferred from the destination port; anything else is plain TCP
+PORT_PROTOCOL = {
+    80: "HTTP",
+    443: "HTTPS",
+    22: "SSH",
+    21: "FTP",
+    25: "SMTP",
+    587: "SMTP"
 }
 
 # Behavior mapping based on Snort classification
@@ -101,6 +167,150 @@ BEHAVIOR_PATTERNS = {
     r"C2|Command[_ ]and[_ ]Control": "malware_c2"
 }
 
+# BEHAVIOR_PATTERNS compiled once at import
+BEHAVIOR_PATTERNS_COMPILED = [(re.compile(p, re.IGNORECASE), b) for p, b in BEHAVIOR_PATTERNS.items()]
+
+# All BEHAVIOR_PATTERNS fused into one alternation, used only to reject
+# signatures that match none of them in a single scan
+_BEHAVIOR_UNION = re.compile('|'.join(f'(?:{p})' for p in BEHAVIOR_PATTERNS), re.IGNORECASE)
+
+class AlertParseError(Exception):
+    """Raised when a Snort alert lacks the fields needed for a CyberCare threat"""
+
+
+# Classification dispatch bound once at import; a single hash probe replaces
+# the membership test plus index lookup
+_behavior_for_classification = BEHAVIOR_MAPPING.get
+
+def _expand_literals(pattern):
+    """Expand a BEHAVIOR_PATTERNS regex into the literal strings it matches
+    
+    Only alternation and bracketed character sets are supported, which covers
+    every entry in the table.
+    """
+    literals = []
+    for alternative in pattern.split('|'):
+        expanded = ['']
+        for token in re.findall(r'\[[^\]]*\]|[^\[]', alternative):
+            choices = token[1:-1] if token.startswith('[') else token
+            expanded = [prefix + char for prefix in expanded for char in choices]
+        literals.extend(expanded)
+    return literals
+
+
+def _build_signature_automaton():
+    """Build one automaton matching every literal variant of BEHAVIOR_PATTERNS"""
+    automaton = ahocorasick.Automaton()
+    for index, (pattern, b_type) in enumerate(BEHAVIOR_PATTERNS.items()):
+        for literal in _expand_literals(pattern):
+            automaton.add_word(literal.lower(), (index, b_type))
+    automaton.make_automaton()
+    return automaton
+
+
+def _build_signature_database():
+    """Compile BEHAVIOR_PATTERNS into a block-mode Hyperscan database"""
+    count = len(BEHAVIOR_PATTERNS)
+    database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    database.compile(
+        expressions=[p.encode() for p in BEHAVIOR_PATTERNS],
+        ids=list(range(count)),
+        elements=count,
+        flags=[hyperscan.HS_FLAG_CASELESS] * count
+    )
+    return database
+
+
+_BEHAVIOR_TYPES = list(BEHAVIOR_PATTERNS.values())
+
+
+@lru_cache(maxsize=None)
+def _signature_matchers():
+    """Build the (Hyperscan database, Aho-Corasick automaton) pair on first use
+    
+    At most one is built; with neither installed both are None and the regex
+    patterns are used.
+    """
+    if HYPERSCAN_AVAILABLE:
+        return _build_signature_database(), None
+    if AHOCORASICK_AVAILABLE:
+        return None, _build_signature_automaton()
+    return None, None
+
+
+def _match_signature(signature):
+    """Return the behavior of the first BEHAVIOR_PATTERNS entry matching signature
+    
+    Table order decides between overlapping patterns, whichever matcher runs.
+    """
+    database, automaton = _signature_matchers()
+    if database is not None:
+        matches = []
+        database.scan(
+            signature.encode(),
+            match_event_handler=lambda index, start, end, flags, context: matches.append(index)
+        )
+        return _BEHAVIOR_TYPES[min(matches)] if matches else None
+    
+    if automaton is not None:
+        # One linear scan; the lowest table index wins, as in the regex loop
+        match = min((value for _, value in automaton.iter(signature.lower())), default=None)
+        return match[1] if match else None
+    
+    if not _BEHAVIOR_UNION.search(signature):
+        return None
+    for pattern, b_type in BEHAVIOR_PATTERNS_COMPILED:
+        if pattern.search(signature):
+            return b_type
+    return None
+
+
+@lru_cache(maxsize=4096)
+def classify(classification, signature):
+    """Map a Snort classification/signature pair to a CyberCare behavior
+    
+    Rule sets only have a few thousand distinct pairs while the same SIDs
+    fire constantly, so results are memoized. Callers pass '' rather than
+    None for missing fields so both share one cache entry.
+    """
+    # 1. Check if classification directly maps to a known behavior
+    behavior = _behavior_for_classification(classification)
+    if behavior:
+        return behavior
+    
+    # 2. Try to match signature name against behavior patterns
+    if signature:
+        return _match_signature(signature) or "unknown"
+    
+    return "unknown"
+
+
+def iter_json_array(payloads):
+    """Yield a JSON array body from already-encoded JSON items
+    
+    Passing the generator as a request body makes requests stream it with
+    chunked transfer encoding, so the full batch is never joined in memory.
+    """
+    yield b'['
+    first = True
+    for payload in payloads:
+        if not first:
+            yield b','
+        first = False
+        yield payload
+    yield b']'
+
+
+def iter_gzip(chunks, level=GZIP_LEVEL):
+    """Gzip a stream of byte chunks incrementally, preserving streaming"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
 class SnortAlert:
     """Represents a parsed Snort alert"""
     
@@ -108,6 +318,15 @@ class SnortAlert:
     ALERT_PATTERN = r'\[\*\*\] \[(.*?)\] (.*?) \[\*\*\]'
     CLASSIFICATION_PATTERN = r'\[Classification: (.*?)\] \[Priority: (\d+)\]'
     IP_PATTERN = r'(\d+/\d+-\d+:\d+:\d+\.\d+) ([\d\.]+):(\d+) -> ([\d\.]+):(\d+)'
+    _ALERT_RE = re.compile(ALERT_PATTERN)
+    _CLASSIFICATION_RE = re.compile(CLASSIFICATION_PATTERN)
+    _IP_RE = re.compile(IP_PATTERN)
+    # Classification line and address line following the header, matched
+    # in a single anchored scan; each line must start with its field
+    _ALERT_BODY_RE = re.compile(
+        r'\[Classification: (?P<cls>[^\n]*?)\] \[Priority: (?P<pri>\d+)\][^\n]*\n'
+        r'(?P<ts>\d+/\d+-\d+:\d+:\d+\.\d+) (?P<sip>[\d\.]+):(?P<sp>\d+) -> (?P<dip>[\d\.]+):(?P<dp>\d+)'
+    )
     
     def __init__(self, log_entry):
         self.raw_log = log_entry
@@ -124,12 +343,61 @@ class SnortAlert:
         self.protocol = None
         self.parse_alert(log_entry)
     
+    @classmethod
+    def _match_entry(cls, log_entry):
+        """Match a well-formed entry, returning (sid, signature, body match) or None
+        
+        The fixed "[**] [gid:sid:rev] signature [**]" header is split with
+        str.partition, leaving only the body to the regex.
+        """
+        entry = log_entry.lstrip()
+        if entry.startswith('[**] ['):
+            header, _, body = entry.partition('\n')
+            sid_str, _, rest = header[6:].partition('] ')
+            signature, found, _ = rest.partition(' [**]')
+            if found:
+                match = cls._ALERT_BODY_RE.match(body)
+                if match:
+                    return sid_str, signature, match
+        return None
+    
+    @classmethod
+    def is_complete(cls, log_entry):
+        """Return True if log_entry holds a full header, classification and address line"""
+        return log_entry.endswith('\n') and cls._match_entry(log_entry) is not None
+    
     def parse_alert(self, log_entry):
         """Parse a Snort log entry into structured data"""
+        # Fast path for well-formed entries; anything else is parsed line by line
+        matched = self._match_entry(log_entry)
+        
+        if matched:
+            sid_str, signature, match = matched
+            self.signature = signature
+            sid_parts = sid_str.split(':')
+            if len(sid_parts) >= 3:
+                self.signature_id = sid_parts[1]
+                self.signature_rev = sid_parts[2]
+            self.classification = match['cls']
+            self.priority = int(match['pri'])
+            self.timestamp = match['ts']
+            self.source_ip = match['sip']
+            self.source_port = int(match['sp'])
+            self.dest_ip = match['dip']
+            self.dest_port = int(match['dp'])
+        else:
+            self._parse_lines(log_entry)
+        
+        # Infer protocol based on port numbers
+        if self.dest_port is not None:
+            self.protocol = PORT_PROTOCOL.get(self.dest_port, "TCP")
+    
+    def _parse_lines(self, log_entry):
+        """Fall back to parsing each line of an irregular entry separately"""
         lines = log_entry.strip().split('\n')
         
         # Parse alert header
-        alert_match = re.search(self.ALERT_PATTERN, lines[0])
+        alert_match = self._ALERT_RE.match(lines[0])
         if alert_match:
             sid_str = alert_match.group(1)
             self.signature = alert_match.group(2)
@@ -141,52 +409,32 @@ class SnortAlert:
                     self.signature_id = sid_parts[1]
                     self.signature_rev = sid_parts[2]
                 except (IndexError, ValueError) as e:
-                    print(f"Error parsing SID parts: {e}")
+                    logger.warning("Error parsing SID parts: %s", e)
         
         # Parse classification and priority
         if len(lines) > 1:
-            class_match = re.search(self.CLASSIFICATION_PATTERN, lines[1])
+            class_match = self._CLASSIFICATION_RE.match(lines[1].lstrip())
             if class_match:
                 self.classification = class_match.group(1)
                 self.priority = int(class_match.group(2))
         
         # Parse IP addresses, ports, and timestamp
         if len(lines) > 2:
-            ip_match = re.search(self.IP_PATTERN, lines[2])
+            ip_match = self._IP_RE.match(lines[2].lstrip())
             if ip_match:
                 self.timestamp = ip_match.group(1)
                 self.source_ip = ip_match.group(2)
                 self.source_port = int(ip_match.group(3))
                 self.dest_ip = ip_match.group(4)
                 self.dest_port = int(ip_match.group(5))
-                
-                # Infer protocol based on port numbers
-                if self.dest_port == 80 or self.dest_port == 443:
-                    self.protocol = "HTTP" if self.dest_port == 80 else "HTTPS"
-                elif self.dest_port == 22:
-                    self.protocol = "SSH"
-                elif self.dest_port == 21:
-                    self.protocol = "FTP"
-                elif self.dest_port == 25 or self.dest_port == 587:
-                    self.protocol = "SMTP"
-                else:
-                    # Default to TCP
-                    self.protocol = "TCP"
     
     def to_cybercare_threat(self):
         """Convert Snort alert to CyberCare threat format"""
-        # Determine behavior based on classification or signature name
-        behavior = "unknown"
+        if not self.source_ip or not self.dest_ip:
+            raise AlertParseError("missing source or destination IP")
         
-        # 1. Check if classification directly maps to a known behavior
-        if self.classification and self.classification in BEHAVIOR_MAPPING:
-            behavior = BEHAVIOR_MAPPING[self.classification]
-        else:
-            # 2. Try to match signature name against behavior patterns
-            for pattern, b_type in BEHAVIOR_PATTERNS.items():
-                if self.signature and re.search(pattern, self.signature, re.IGNORECASE):
-                    behavior = b_type
-                    break
+        # Determine behavior based on classification or signature name
+        behavior = classify(self.classification or "", self.signature or "")
         
         # Additional data to include
         additional_data = {
@@ -211,19 +459,51 @@ class SnortAlert:
         return threat_data
 
 
+def _parse_and_classify(alert_text):
+    """Parse a raw alert into CyberCare threat data, or None if it fails
+    
+    Kept at module level so it can be pickled for worker processes.
+    """
+    try:
+        return SnortAlert(alert_text).to_cybercare_threat()
+    except AlertParseError as e:
+        logger.warning("Skipping alert due to %s: %.50s...", e, alert_text)
+    except Exception as e:
+        logger.error("Error parsing alert: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+    return None
+
+
 class SnortLogWatcher:
     """Watches Snort log files and processes new alerts"""
     
-    def __init__(self, log_path, api_url, batch_size=10, batch_mode=False, db_path=DEFAULT_CONFIG["db_path"], use_ai=DEFAULT_CONFIG["use_ai"]):
+    def __init__(self, log_path, api_url, batch_size=10, batch_mode=False, db_path=DEFAULT_CONFIG["db_path"], use_ai=DEFAULT_CONFIG["use_ai"], parse_workers=DEFAULT_CONFIG["parse_workers"], compress_batches=DEFAULT_CONFIG["compress_batches"]):
         super().__init__()
         self.log_path = log_path
         self.api_url = api_url
         self.batch_size = batch_size
         self.batch_mode = batch_mode
+        self.compress_batches = compress_batches  # The API must accept gzip request bodies
         self.batch_url = api_url.replace('/analyze', '/batch-analyze') if '/analyze' in api_url else f"{api_url.rstrip('/')}/batch-analyze"
         self.last_position = 0
-        self.pending_alerts = []
-        self.use_ai = use_ai and AZURE_AI_AVAILABLE
+        self.fd = None  # Kept open across polls; reopened on truncation
+        self._tail = bytearray()  # Alert bytes not yet terminated by a blank line
+        self._tail_updated = time.monotonic()  # When _tail last grew
+        # Pending batch kept as parallel columns: threats are encoded once
+        # when queued, and only their IDs are needed after sending
+        self.pending_ids = deque()
+        self.pending_payloads = deque()
+        self.use_ai = use_ai and azure_ai_service_manager() is not None
+        
+        # Reuse keep-alive connections to the API across alerts
+        self.session = requests.Session()
+        for prefix in ('http://', 'https://'):
+            self.session.mount(prefix, HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        self.parse_workers = parse_workers
+        self.parse_pool = None  # Created on the first burst large enough to need it
+        
+        # Batch mode sends from the polling thread; single alerts use the pool
+        self.send_pool = None if batch_mode else ThreadPoolExecutor(max_workers=SEND_WORKERS)
+        self.send_slots = BoundedSemaphore(MAX_IN_FLIGHT_SENDS)
         
         # Initialize database connector for persistent storage
         try:
@@ -233,118 +513,273 @@ class SnortLogWatcher:
             logger.error(f"Failed to initialize database: {str(e)}. Using in-memory storage only.")
             self.db = None
         
+        # Writes go through a single writer thread so parsing and HTTP sends
+        # never wait on SQLite commits
+        self.db_queue = None
+        self.db_writer = None
+        
+        # Set whenever a send fails; the retry thread only scans the database
+        # after that. Starts set so a backlog from a previous run is retried.
+        self.retry_needed = Event()
+        if self.db:
+            self.retry_needed.set()
+            self.db_queue = queue.Queue(maxsize=DB_QUEUE_SIZE)
+            self.db_writer = Thread(target=self._db_writer, daemon=True)
+            self.db_writer.start()
+        
         # Initialize Azure AI services if available and enabled
         self.ai_service = None
         if self.use_ai:
             try:
-                self.ai_service = AzureAIServiceManager()
+                self.ai_service = azure_ai_service_manager()()
                 logger.info("Azure AI services initialized successfully")
             except Exception as e:
                 logger.error(f"Failed to initialize Azure AI services: {str(e)}")
                 self.use_ai = False
         
         # Initialize by checking current file size
-        if os.path.exists(log_path):
+        if self.open_log():
             self.last_position = 0  # Start from beginning to process all alerts
-            logger.info(f"Log path exists: {log_path}, size: {os.path.getsize(log_path)} bytes")
+            logger.info(f"Log path exists: {log_path}, size: {os.fstat(self.fd).st_size} bytes")
         else:
             logger.warning(f"Warning: Log file {log_path} not found")
     
+    def open_log(self):
+        """Open the log file descriptor, returning False if the file is missing"""
+        try:
+            self.fd = os.open(self.log_path, os.O_RDONLY | os.O_NONBLOCK)
+        except FileNotFoundError:
+            return False
+        return True
+    
+    def log_rotated(self, stat):
+        """Return True if log_path now refers to a different file than the open descriptor"""
+        try:
+            return os.stat(self.log_path).st_ino != stat.st_ino
+        except FileNotFoundError:
+            # Renamed away but not yet recreated; keep the current descriptor
+            return False
+    
+    def close_log(self):
+        """Close the log file descriptor if it is open"""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+    
+    def close(self):
+        """Flush queued database writes and release all resources"""
+        if self.parse_pool:
+            self.parse_pool.shutdown()
+            self.parse_pool = None
+        # In-flight sends queue submission results, so drain them first
+        if self.send_pool:
+            self.send_pool.shutdown()
+            self.send_pool = None
+        if self.db_writer:
+            self.db_queue.put(None)
+            self.db_writer.join()
+            self.db_writer = None
+        self.close_log()
+        self.session.close()
+    
+    def queue_db_write(self, op, *args):
+        """Hand a database write to the writer thread (no-op without a database)"""
+        if self.db_queue is not None:
+            self.db_queue.put((op, *args))
+    
+    def _db_writer(self):
+        """Apply queued database writes until close() sends the stop sentinel"""
+        while True:
+            ops = [self.db_queue.get()]
+            while len(ops) < DB_WRITE_BATCH:
+                try:
+                    ops.append(self.db_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stop = None in ops
+            self._apply_db_writes([op for op in ops if op is not None])
+            if stop:
+                return
+    
+    def _apply_db_writes(self, ops):
+        """Apply a group of queued writes with one transaction per kind
+        
+        Stores run before AI updates and submission results, which preserves
+        the store-then-update order each threat's writes were queued in.
+        """
+        stores = [threat for op, *args in ops if op == 'store' for threat in args[0]]
+        if stores:
+            try:
+                self.db.store_batch(stores)
+                logger.debug("Stored batch of %d threats in database", len(stores))
+            except Exception as e:
+                logger.error("Failed to store threat batch in database: %s", e)
+        
+        for op, *args in ops:
+            if op == 'ai_analysis':
+                self.db.update_ai_analysis(*args)
+        
+        submissions = [tuple(args) for op, *args in ops if op == 'submitted']
+        if submissions:
+            self.db.mark_batch_as_submitted(submissions)
+    
     def on_modified(self, event):
         """Handle file modification events"""
-        if event.src_path == self.log_path:
-            print(f"File modified: {event.src_path}")
+        if os.path.abspath(event.src_path) == os.path.abspath(self.log_path):
+            logger.debug("File modified: %s", event.src_path)
             self.process_new_alerts()
     
     def process_new_alerts(self):
         """Read and process new alerts from the log file"""
-        if not os.path.exists(self.log_path):
-            print(f"WARNING: Log file {self.log_path} not found")
+        if self.fd is None and not self.open_log():
+            logger.warning("Log file %s not found", self.log_path)
             return
         
-        # Get current file size
-        current_size = os.path.getsize(self.log_path)
-        print(f"DEBUG: Processing new alerts. Current file size: {current_size}, last position: {self.last_position}")
+        # Get current file size from the open descriptor (no path lookup)
+        stat = os.fstat(self.fd)
+        current_size = stat.st_size
+        logger.debug("Processing new alerts. Current file size: %d, last position: %d", current_size, self.last_position)
         
-        # If file was truncated, reset position
-        if current_size < self.last_position:
-            print(f"DEBUG: Log file was truncated, resetting position from {self.last_position} to 0")
+        # If file was truncated or deleted, reopen it and reset position
+        if current_size < self.last_position or stat.st_nlink == 0:
+            logger.debug("Log file was truncated, resetting position from %d to 0", self.last_position)
+            self.close_log()
             self.last_position = 0
+            self._tail.clear()
+            if not self.open_log():
+                logger.warning("Log file %s not found", self.log_path)
+                return
+            current_size = os.fstat(self.fd).st_size
         
-        # If no new content, return
-        if current_size == self.last_position:
-            print(f"DEBUG: No new content in log file. Size: {current_size}")
-            return
+        # If no new content, return unless the path now names a new file
+        # (log rotated by rename); the old file has been fully drained by now
+        if current_size == self.last_position and not self._tail:
+            if not self.log_rotated(stat):
+                logger.debug("No new content in log file. Size: %d", current_size)
+                return
+            logger.debug("Log file was rotated, reopening %s", self.log_path)
+            self.close_log()
+            self.last_position = 0
+            if not self.open_log():
+                return
+            current_size = os.fstat(self.fd).st_size
         
         # Read new content
         try:
-            with open(self.log_path, 'r') as f:
-                f.seek(self.last_position)
-                new_content = f.read()
-                print(f"DEBUG: Read {len(new_content)} bytes of new content from log file")
-                self.last_position = current_size
+            alerts = self.read_alerts(current_size)
+            logger.debug("Found %d new alerts in content", len(alerts))
             
-            # Process each alert (split by blank lines)
-            alerts = [a.strip() for a in new_content.split('\n\n') if a.strip()]
-            print(f"DEBUG: Found {len(alerts)} new alerts in content")
+            # Parse and convert to CyberCare threat format; DB and HTTP work
+            # below stays on this thread to keep ordering and session reuse.
+            # Alerts that failed to parse were already logged.
+            threats = [threat_data for threat_data in self.parse_alerts(alerts) if threat_data is not None]
             
-            batch_threats = []
+            # Store the whole poll cycle in persistent storage with one write;
+            # IDs are assigned first so later status updates can reference them
+            if self.db and threats:
+                for threat_data in threats:
+                    threat_data['id'] = DatabaseConnector.generate_threat_id()
+                self.queue_db_write('store', threats)
             
-            for alert_text in alerts:
-                print(f"DEBUG: Processing alert: {alert_text[:100]}...")
+            for threat_data in threats:
                 try:
-                    alert = SnortAlert(alert_text)
-                    
-                    # Convert to CyberCare threat format
-                    threat_data = alert.to_cybercare_threat()
-                    
-                    # If any required fields are missing, skip this alert
-                    if not threat_data["source_ip"] or not threat_data["destination_ip"]:
-                        print(f"Skipping alert due to missing required fields: {alert_text[:50]}...")
-                        continue
-                    
-                    # Store in persistent storage if available
-                    if self.db:
-                        try:
-                            threat_id = self.db.store_threat(threat_data)
-                            print(f"DEBUG: Stored threat {threat_id} in database")
-                        except Exception as e:
-                            print(f"ERROR: Failed to store threat in database: {str(e)}")
-                    
                     if self.batch_mode:
                         # Add to pending alerts for batch processing
-                        self.pending_alerts.append(threat_data)
-                        
-                        # For database batch processing
-                        batch_threats.append(threat_data)
+                        self.pending_ids.append(threat_data.get('id'))
+                        self.pending_payloads.append(orjson.dumps(threat_data))
                         
                         # If batch size reached, send the batch
-                        if len(self.pending_alerts) >= self.batch_size:
+                        if len(self.pending_payloads) >= self.batch_size:
                             self.send_batch()
                     else:
                         # Send individual alert
-                        self.send_alert(threat_data)
+                        self.submit_alert(threat_data)
                 except Exception as e:
-                    print(f"Error processing alert: {str(e)}")
-                    print(f"DEBUG: Traceback: {traceback.format_exc()}")
-            
-            # Store batch in database if in batch mode and database is available
-            if self.batch_mode and self.db and batch_threats:
-                try:
-                    self.db.store_batch(batch_threats)
-                    print(f"DEBUG: Stored batch of {len(batch_threats)} threats in database")
-                except Exception as e:
-                    print(f"ERROR: Failed to store threat batch in database: {str(e)}")
+                    logger.error("Error processing alert: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
                 
         except Exception as e:
-            print(f"Error reading log file: {str(e)}")
-            print(f"DEBUG: Traceback: {traceback.format_exc()}")
+            logger.error("Error reading log file: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+    
+    def read_alerts(self, current_size):
+        """Read the log up to current_size and return the complete alerts in it
+        
+        Alerts are terminated by a blank line. A trailing partial alert stays
+        in self._tail until the rest of it is written. When a poll finds
+        nothing new behind it, it is only flushed once it parses as a complete
+        alert, or once it exceeds PARTIAL_ALERT_MAX_AGE or
+        PARTIAL_ALERT_MAX_BYTES.
+        """
+        if current_size == self.last_position:
+            # Nothing was appended since the last read. The leftover may be a
+            # complete alert written without a trailing blank line, or one
+            # Snort is still writing
+            text = self._tail.decode('utf-8', errors='replace')
+            if not SnortAlert.is_complete(text):
+                if (time.monotonic() - self._tail_updated < PARTIAL_ALERT_MAX_AGE
+                        and len(self._tail) < PARTIAL_ALERT_MAX_BYTES):
+                    return []
+                logger.warning("Flushing incomplete alert after %.0f seconds (%d bytes)",
+                               time.monotonic() - self._tail_updated, len(self._tail))
+            records = [bytes(self._tail)]
+            self._tail.clear()
+        else:
+            self._tail_updated = time.monotonic()
+            while self.last_position < current_size:
+                chunk = os.pread(self.fd, min(READ_CHUNK_SIZE, current_size - self.last_position), self.last_position)
+                if not chunk:
+                    break
+                logger.debug("Read %d bytes of new content from log file", len(chunk))
+                self.last_position += len(chunk)
+                # Normalize CRLF line endings, including a pair split across reads
+                if chunk.startswith(b'\n') and self._tail.endswith(b'\r'):
+                    del self._tail[-1]
+                self._tail += chunk.replace(b'\r\n', b'\n')
+            
+            # A new alert header right after a line ends the previous alert,
+            # even when no blank line separates them
+            self._tail = self._tail.replace(b'\n[**] [', b'\n\n[**] [')
+            
+            records = []
+            start = 0
+            end = self._tail.find(b'\n\n')
+            while end >= 0:
+                records.append(bytes(self._tail[start:end]))
+                start = end + 2
+                end = self._tail.find(b'\n\n', start)
+            del self._tail[:start]
+        
+        alerts = (record.decode('utf-8', errors='replace').strip() for record in records)
+        return [alert for alert in alerts if alert]
+    
+    def parse_alerts(self, alerts):
+        """Parse raw alerts, fanning large bursts out to worker processes"""
+        if self.parse_workers > 1 and len(alerts) >= PARALLEL_PARSE_THRESHOLD:
+            if self.parse_pool is None:
+                # The DB writer and send threads are already running, and
+                # forking a threaded process can leave children holding locks
+                self.parse_pool = ProcessPoolExecutor(
+                    max_workers=self.parse_workers,
+                    mp_context=multiprocessing.get_context("forkserver")
+                )
+            return list(self.parse_pool.map(_parse_and_classify, alerts, chunksize=PARSE_CHUNKSIZE))
+        return [_parse_and_classify(alert_text) for alert_text in alerts]
+    
+    def submit_alert(self, threat_data):
+        """Send an alert from the send pool, waiting while too many are in flight"""
+        self.send_slots.acquire()
+        try:
+            future = self.send_pool.submit(self.send_alert, threat_data)
+        except BaseException:
+            self.send_slots.release()
+            raise
+        future.add_done_callback(lambda _: self.send_slots.release())
     
     def send_alert(self, threat_data):
         """Send a single alert to the API"""
         try:
-            logger.info(f"Sending alert to {self.api_url}")
-            logger.debug(f"Alert data: {json.dumps(threat_data, indent=2)}")
+            logger.info("Sending alert to %s", self.api_url)
+            logger.debug("Alert data: %s", threat_data)
             
             # Store the threat ID if it exists
             threat_id = threat_data.get('id', None)
@@ -353,10 +788,10 @@ class SnortLogWatcher:
             ai_analysis_result = None
             if self.use_ai and self.ai_service:
                 try:
-                    logger.info(f"Performing AI analysis for threat {threat_id}")
+                    logger.info("Performing AI analysis for threat %s", threat_id)
                     ai_analysis_result = self.ai_service.analyze_threat(threat_data)
                     if ai_analysis_result:
-                        logger.info(f"AI analysis complete for threat {threat_id}")
+                        logger.info("AI analysis complete for threat %s", threat_id)
                         
                         # Add AI analysis summary to the threat data for API submission
                         if 'classification' in ai_analysis_result:
@@ -366,94 +801,90 @@ class SnortLogWatcher:
                             threat_data['confidence'] = classification.get('confidence', '')
                             
                         # Store full AI analysis in the database
-                        if self.db and threat_id:
-                            self.db.update_ai_analysis(threat_id, ai_analysis_result)
+                        if threat_id:
+                            self.queue_db_write('ai_analysis', threat_id, ai_analysis_result)
                 except Exception as ai_e:
-                    logger.error(f"Error during AI analysis: {str(ai_e)}")
+                    logger.error("Error during AI analysis: %s", ai_e)
             
             # Send the threat to the API
-            response = requests.post(self.api_url, json=threat_data)
+            response = self.session.post(self.api_url, data=orjson.dumps(threat_data), headers=JSON_HEADERS, timeout=HTTP_TIMEOUT)
             
             if response.status_code == 200:
-                logger.info(f"Alert sent successfully: {response.status_code}")
-                logger.debug(f"Response data: {json.dumps(response.json(), indent=2)}")
+                logger.info("Alert sent successfully: %d", response.status_code)
+                response_data = orjson.loads(response.content)
+                logger.debug("Response data: %s", response_data)
                 
                 # Update database if available
-                if self.db and threat_id:
-                    try:
-                        self.db.mark_as_submitted(threat_id, True, response.json())
-                    except Exception as e:
-                        logger.error(f"Failed to update threat submission status: {str(e)}")
+                if threat_id:
+                    self.queue_db_write('submitted', threat_id, True, response_data, None)
             else:
-                logger.error(f"Failed to send alert: HTTP {response.status_code}")
-                logger.debug(f"Response text: {response.text}")
+                logger.error("Failed to send alert: HTTP %d", response.status_code)
+                self.retry_needed.set()
+                logger.debug("Response text: %s", response.text)
                 
                 # Update database if available
-                if self.db and threat_id:
-                    try:
-                        self.db.mark_as_submitted(threat_id, False, None, f"HTTP {response.status_code}: {response.text}")
-                    except Exception as e:
-                        logger.error(f"Failed to update threat submission status: {str(e)}")
+                if threat_id:
+                    self.queue_db_write('submitted', threat_id, False, None, f"HTTP {response.status_code}: {response.text}")
                         
         except Exception as e:
-            logger.error(f"Exception sending alert: {str(e)}")
-            logger.debug(f"Traceback: {traceback.format_exc()}")
+            logger.error("Exception sending alert: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+            self.retry_needed.set()
             
             # Update database if available
-            if self.db and threat_id:
-                try:
-                    self.db.mark_as_submitted(threat_id, False, None, str(e))
-                except Exception as db_e:
-                    logger.error(f"Failed to update threat submission status: {str(db_e)}")
+            if threat_id:
+                self.queue_db_write('submitted', threat_id, False, None, str(e))
+    
+    def requeue_batch(self, ids, payloads):
+        """Put a failed batch back at the front of the pending columns"""
+        self.pending_ids.extendleft(reversed(ids))
+        self.pending_payloads.extendleft(reversed(payloads))
     
     def send_batch(self):
         """Send pending alerts as a batch"""
-        if not self.pending_alerts:
+        if not self.pending_payloads:
             return
         
+        # Drain the queue; failed batches are put back at the front below
+        ids = list(self.pending_ids)
+        batch = list(self.pending_payloads)
+        self.pending_ids.clear()
+        self.pending_payloads.clear()
+        
+        # Store threat IDs for database updates
+        threat_ids = [threat_id for threat_id in ids if threat_id is not None]
+        
         try:
-            logger.info(f"Sending batch of {len(self.pending_alerts)} alerts to {self.batch_url}")
+            logger.info("Sending batch of %d alerts to %s", len(batch), self.batch_url)
             
-            # Store threat IDs for database updates
-            threat_ids = [threat.get('id') for threat in self.pending_alerts if 'id' in threat]
-            
-            response = requests.post(self.batch_url, json=self.pending_alerts)
+            body = iter_json_array(batch)
+            if self.compress_batches:
+                response = self.session.post(self.batch_url, data=iter_gzip(body), headers=GZIP_JSON_HEADERS, timeout=HTTP_TIMEOUT)
+            else:
+                response = self.session.post(self.batch_url, data=body, headers=JSON_HEADERS, timeout=HTTP_TIMEOUT)
             
             if response.status_code in (200, 202):
-                logger.info(f"Successfully sent batch of {len(self.pending_alerts)} alerts")
+                logger.info("Successfully sent batch of %d alerts", len(batch))
                 
                 # Update database if available
-                if self.db and threat_ids:
-                    for threat_id in threat_ids:
-                        try:
-                            self.db.mark_as_submitted(threat_id, True, {'status': 'success', 'batch_size': len(self.pending_alerts)})
-                        except Exception as e:
-                            logger.error(f"Failed to update threat submission status for {threat_id}: {str(e)}")
-                
-                # Clear pending alerts after successful submission
-                self.pending_alerts = []
+                for threat_id in threat_ids:
+                    self.queue_db_write('submitted', threat_id, True, {'status': 'success', 'batch_size': len(batch)}, None)
             else:
-                logger.error(f"Failed to send batch: HTTP {response.status_code}, {response.text}")
+                logger.error("Failed to send batch: HTTP %d, %s", response.status_code, response.text)
+                self.requeue_batch(ids, batch)
+                self.retry_needed.set()
                 
                 # Update database if available
-                if self.db and threat_ids:
-                    error_msg = f"HTTP {response.status_code}: {response.text}"
-                    for threat_id in threat_ids:
-                        try:
-                            self.db.mark_as_submitted(threat_id, False, None, error_msg)
-                        except Exception as e:
-                            logger.error(f"Failed to update threat submission status for {threat_id}: {str(e)}")
+                error_msg = f"HTTP {response.status_code}: {response.text}"
+                for threat_id in threat_ids:
+                    self.queue_db_write('submitted', threat_id, False, None, error_msg)
         except Exception as e:
-            logger.error(f"Error sending batch: {str(e)}")
-            logger.debug(f"Traceback: {traceback.format_exc()}")
+            logger.error("Error sending batch: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+            self.requeue_batch(ids, batch)
+            self.retry_needed.set()
             
             # Update database if available
-            if self.db and threat_ids:
-                for threat_id in threat_ids:
-                    try:
-                        self.db.mark_as_submitted(threat_id, False, None, str(e))
-                    except Exception as db_e:
-                        logger.error(f"Failed to update threat submission status for {threat_id}: {str(db_e)}")
+            for threat_id in threat_ids:
+                self.queue_db_write('submitted', threat_id, False, None, str(e))
 
 class SnortLogEventHandler(FileSystemEventHandler):
     """Event handler to detect log file changes"""
@@ -461,9 +892,13 @@ class SnortLogEventHandler(FileSystemEventHandler):
     def __init__(self, watcher):
         super().__init__()
         self.watcher = watcher
+        self.log_path = os.path.abspath(watcher.log_path)
     
     def on_modified(self, event):
         """Handle file modification events"""
+        # The observer watches the whole directory; ignore other files early
+        if event.src_path != self.log_path:
+            return
         self.watcher.on_modified(event)
 
 
@@ -472,28 +907,33 @@ def retry_unsent_alerts(watcher, retry_interval, retry_limit):
     retry_count = 0
     while True:
         try:
-            # Sleep first to allow initial processing to complete
+            # Block until a send has failed, then sleep first to allow
+            # initial processing to complete and to pace retries
+            watcher.retry_needed.wait()
             time.sleep(retry_interval)
+            watcher.retry_needed.clear()
             
             if not watcher.db:
                 logger.warning("Database not available, can't retry unsent threats")
                 return
                 
-            unsent_threats = watcher.db.get_unsent_threats()
-            if unsent_threats:
-                logger.info(f"Found {len(unsent_threats)} unsent threats to retry")
+            # Page through the backlog so memory stays bounded by the batch size
+            found = 0
+            for unsent_threats in watcher.db.iter_unsent_threats(watcher.batch_size):
+                found += len(unsent_threats)
+                logger.info("Retrying %d unsent threats", len(unsent_threats))
                 
                 for threat in unsent_threats:
                     # Check if retry limit has been reached
                     if 'retry_count' in threat and threat['retry_count'] >= retry_limit:
-                        logger.warning(f"Retry limit reached for threat {threat.get('id')}, marking as permanently failed")
+                        logger.warning("Retry limit reached for threat %s, marking as permanently failed", threat.get('id'))
                         watcher.db.mark_as_permanently_failed(threat.get('id'))
                         continue
                     
                     # Process threat with AI if enabled
                     if watcher.use_ai and watcher.ai_service:
                         try:
-                            logger.info(f"Performing AI analysis for unsent threat {threat.get('id')}")
+                            logger.info("Performing AI analysis for unsent threat %s", threat.get('id'))
                             ai_analysis_result = watcher.ai_service.analyze_threat(threat)
                             if ai_analysis_result:
                                 # Update the threat with AI analysis information
@@ -506,7 +946,7 @@ def retry_unsent_alerts(watcher, retry_interval, retry_limit):
                                 # Store AI analysis in database
                                 watcher.db.update_ai_analysis(threat.get('id'), ai_analysis_result)
                         except Exception as ai_e:
-                            logger.error(f"Error during AI analysis for retry: {str(ai_e)}")
+                            logger.error("Error during AI analysis for retry: %s", ai_e)
                     
                     # Attempt to send the threat
                     watcher.send_alert(threat)
@@ -517,24 +957,26 @@ def retry_unsent_alerts(watcher, retry_interval, retry_limit):
                     
                     # Add a small delay between retries to avoid flooding the API
                     time.sleep(1)
-            else:
+            
+            if not found:
                 logger.debug("No unsent threats found to retry")
                 
         except Exception as e:
-            logger.error(f"Error in retry thread: {str(e)}")
-            logger.debug(traceback.format_exc())
+            logger.error("Error in retry thread: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
 
 def watch_mode(watcher, log_path):
     """Use file system events to monitor log file changes"""
-    log_dir = os.path.dirname(log_path)
+    # Watch the directory rather than the file's inode so a rotated log is
+    # picked up; events for other files are dropped by the handler
+    log_dir = os.path.dirname(os.path.abspath(log_path))
     logger.info(f"Using file system monitoring for {log_dir}")
     
     # Create event handler for file changes
     event_handler = SnortLogEventHandler(watcher)
     
-    # Set up observer
+    # Set up observer, subscribed to modifications only
     observer = Observer()
-    observer.schedule(event_handler, log_dir, recursive=False)
+    observer.schedule(event_handler, log_dir, recursive=False, event_filter=[FileModifiedEvent])
     observer.start()
     
     try:
@@ -547,6 +989,20 @@ def watch_mode(watcher, log_path):
     finally:
         observer.join()
 
+def watch_mode_fast(watcher, log_path):
+    """Use watchfiles' coalesced native notifications to monitor the log file"""
+    log_path = os.path.abspath(log_path)
+    log_dir = os.path.dirname(log_path)
+    logger.info(f"Using watchfiles monitoring for {log_path}")
+    
+    # As in watch_mode, watch the directory so rotation is noticed, but only
+    # changes to the log file itself wake the watcher
+    try:
+        for _ in watchfiles.watch(log_dir, watch_filter=lambda change, path: path == log_path, recursive=False):
+            watcher.process_new_alerts()
+    except KeyboardInterrupt:
+        logger.info("Stopping file system monitoring")
+
 def poll_mode(watcher, args):
     """Use polling mode for the log file"""
     logger.info(f"Starting polling mode with interval {args.poll_interval} seconds")
@@ -559,6 +1015,11 @@ def poll_mode(watcher, args):
         logger.info("Stopping polling mode")
 
 
+def _exit_on_sigterm(signum, frame):
+    """Turn SIGTERM (docker stop) into SystemExit so main() closes the watcher"""
+    raise SystemExit(128 + signum)
+
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(description='Snort log watcher and alert forwarder')
@@ -572,10 +1033,25 @@ def main():
     parser.add_argument('--retry-interval', type=int, help='Retry interval in seconds', default=DEFAULT_CONFIG["retry_interval"])
     parser.add_argument('--retry-limit', type=int, help='Maximum number of retries', default=DEFAULT_CONFIG["retry_limit"])
     parser.add_argument('--use-ai', action='store_true', help='Enable Azure AI services for threat analysis', default=DEFAULT_CONFIG["use_ai"])
-    parser.add_argument('--watch', action='store_true', help='Use watchdog instead of polling')
+    parser.add_argument('--parse-workers', type=int, help='Worker processes for parsing large alert bursts (1 disables)', default=DEFAULT_CONFIG["parse_workers"])
+    parser.add_argument('--compress-batches', action='store_true', help='Gzip batch request bodies (the API must accept Content-Encoding: gzip)', default=DEFAULT_CONFIG["compress_batches"])
+    parser.add_argument('--watch', action='store_true', help='Use file system notifications (watchfiles, else watchdog) instead of polling')
+    parser.add_argument('--debug-mode', action='store_true', help='Enable verbose debug logging')
     args = parser.parse_args()
     
-    if args.use_ai and not AZURE_AI_AVAILABLE:
+    # Set up logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler("snort_connector.log"),
+            logging.StreamHandler()
+        ]
+    )
+    if args.debug_mode:
+        logging.getLogger().setLevel(logging.DEBUG)
+    
+    if args.use_ai and azure_ai_service_manager() is None:
         logger.warning("Azure AI services were requested but are not available. Continuing without AI enhancement.")
     
     logger.info("Starting Snort connector with the following configuration:")
@@ -589,7 +1065,10 @@ def main():
     logger.info(f"  Retry interval: {args.retry_interval} seconds")
     logger.info(f"  Retry limit: {args.retry_limit}")
     logger.info(f"  Use AI: {args.use_ai}")
+    logger.info(f"  Parse workers: {args.parse_workers}")
+    logger.info(f"  Compress batches: {args.compress_batches}")
     logger.info(f"  Watch mode: {args.watch}")
+    logger.info(f"  Debug mode: {args.debug_mode}")
     
     # Create the watcher
     watcher = SnortLogWatcher(
@@ -598,23 +1077,34 @@ def main():
         args.batch_size, 
         args.batch_mode, 
         args.db_path,
-        args.use_ai
+        args.use_ai,
+        args.parse_workers,
+        args.compress_batches
     )
     
-    # Process any existing alerts
-    watcher.process_new_alerts()
+    # The DB writer is a daemon thread; without this, SIGTERM would kill the
+    # process with queued stores and status updates still unwritten
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
     
-    # Retry unsent alerts if enabled
-    if args.retry_unsent and watcher.db:
-        retry_thread = Thread(target=retry_unsent_alerts, args=(watcher, args.retry_interval, args.retry_limit))
-        retry_thread.daemon = True
-        retry_thread.start()
-    
-    # Use watchdog or polling based on argument
-    if args.watch:
-        watch_mode(watcher, args.log_path)
-    else:
-        poll_mode(watcher, args)
+    try:
+        # Process any existing alerts
+        watcher.process_new_alerts()
+        
+        # Retry unsent alerts if enabled
+        if args.retry_unsent and watcher.db:
+            retry_thread = Thread(target=retry_unsent_alerts, args=(watcher, args.retry_interval, args.retry_limit))
+            retry_thread.daemon = True
+            retry_thread.start()
+        
+        # Use watchdog or polling based on argument
+        if args.watch and WATCHFILES_AVAILABLE:
+            watch_mode_fast(watcher, args.log_path)
+        elif args.watch:
+            watch_mode(watcher, args.log_path)
+        else:
+            poll_mode(watcher, args)
+    finally:
+        watcher.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -7,13 +7,40 @@ the CyberCare API for analysis. It's useful for testing and demonstrating
 the threat detection and response capabilities of the system.
 """
 
+import asyncio
+import aiohttp
 import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import random
 import time
 import ipaddress
 import argparse
-import json
+import logging
+import bisect
+import gzip
+import itertools
+import orjson
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from functools import lru_cache
+
+# NumPy is optional; without it batches are generated one threat at a time
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# httpx with the h2 extra is optional; without it submissions stay on HTTP/1.1
+try:
+    import httpx
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 # Default configuration
 DEFAULT_CONFIG = {
@@ -21,9 +48,35 @@ DEFAULT_CONFIG = {
     "batch_url": "http://localhost:8005/api/v1/threats/batch-analyze",
     "interval_min": 5,
     "interval_max": 15,
-    "batch_size": 5
+    "batch_size": 5,
+    "concurrency": 1,
+    "workers": 1,
+    "target_latency_ms": 0,  # 0 keeps async concurrency fixed
+    "max_concurrency": 64,
+    "connect_timeout": 3.05,  # Just over a multiple of the 3 s TCP retransmit window
+    "read_timeout": 10,
+    "compress_batches": False,
+    "http2": False,
+    "batch_threshold": 0,  # 0 sends each continuous-mode threat on its own
+    "flush_interval_ms": 1000
 }
 
+logger = logging.getLogger(__name__)
+
+# Headers for pre-serialized JSON request bodies
+JSON_HEADERS = {"Content-Type": "application/json"}
+GZIP_JSON_HEADERS = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+
+# Bodies smaller than this are sent uncompressed even when compression is
+# enabled; below it gzip framing and CPU cost outweigh the bytes saved
+GZIP_MIN_BYTES = 4096
+
+
+def _pretty_json(data):
+    """Render a decoded JSON response for display"""
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+
+
 # Attack patterns with realistic signatures
 ATTACK_PATTERNS = {
     "port_scan": {
@@ -94,6 +147,178 @@ ATTACK_PATTERNS = {
     }
 }
 
+# Attack names and per-attack field tables, precomputed so generate_threat
+# neither rebuilds the key list nor type-checks every field on each call.
+# Fields are partitioned by kind into parallel key/value tuples.
+_ATTACK_KEYS = tuple(ATTACK_PATTERNS.keys())
+
+_CompiledAttack = namedtuple(
+    "_CompiledAttack",
+    ["protocols", "list_keys", "list_values", "callable_keys", "callables", "scalars"]
+)
+
+
+def _compile_attack(attack):
+    """Partition an attack pattern's additional_data fields by value kind"""
+    list_items, callable_items, scalars = [], [], {}
+    for key, values in attack["additional_data"].items():
+        if callable(values):
+            callable_items.append((key, values))
+        elif isinstance(values, list):
+            list_items.append((key, tuple(values)))
+        else:
+            scalars[key] = values
+    return _CompiledAttack(
+        tuple(attack["protocols"]),
+        tuple(key for key, _ in list_items),
+        tuple(values for _, values in list_items),
+        tuple(key for key, _ in callable_items),
+        tuple(func for _, func in callable_items),
+        scalars
+    )
+
+
+def _attack_generator(compiled):
+    """Build a closure drawing (protocol, additional_data) for a compiled attack"""
+    protocols, scalars = compiled.protocols, compiled.scalars
+    list_fields = tuple(zip(compiled.list_keys, compiled.list_values))
+    callable_fields = tuple(zip(compiled.callable_keys, compiled.callables))
+    
+    def generate(choice=random.choice):
+        additional_data = dict(scalars)
+        for key, values in list_fields:
+            additional_data[key] = choice(values)
+        for key, func in callable_fields:
+            additional_data[key] = func()
+        return choice(protocols), additional_data
+    
+    return generate
+
+
+_COMPILED_ATTACKS = {name: _compile_attack(attack) for name, attack in ATTACK_PATTERNS.items()}
+
+# Per-attack generators specialised from the compiled tables
+_GEN = {name: _attack_generator(compiled) for name, compiled in _COMPILED_ATTACKS.items()}
+
+# Networks an external source address must avoid: the private, loopback
+# and reserved ranges rejected by random_ip, as (network, netmask) integers
+_NON_PUBLIC_NETWORKS = tuple(
+    (int(net.network_address), int(net.netmask))
+    for net in map(ipaddress.IPv4Network, (
+        "0.0.0.0/8", "10.0.0.0/8", "127.0.0.0/8", "169.254.0.0/16",
+        "172.16.0.0/12", "192.0.0.0/29", "192.0.0.170/31", "192.0.2.0/24",
+        "192.168.0.0/16", "198.18.0.0/15", "198.51.100.0/24", "203.0.113.0/24",
+        "240.0.0.0/4", "255.255.255.255/32"
+    ))
+)
+
+
+def _public_ranges():
+    """Return the inclusive (start, end) address ranges outside _NON_PUBLIC_NETWORKS"""
+    ranges = []
+    start = 0
+    for network, netmask in sorted(_NON_PUBLIC_NETWORKS):
+        if network > start:
+            ranges.append((start, network - 1))
+        start = max(start, network + (~netmask & 0xFFFFFFFF) + 1)
+    if start <= 0xFFFFFFFF:
+        ranges.append((start, 0xFFFFFFFF))
+    return tuple(ranges)
+
+
+# Public addresses are drawn directly: pick an offset into the combined
+# public space and map it back to its range through the cumulative sizes
+_PUBLIC_RANGES = _public_ranges()
+_PUBLIC_CUM = list(itertools.accumulate(end - start + 1 for start, end in _PUBLIC_RANGES))
+
+
+@lru_cache(maxsize=1)
+def _iso_second(second):
+    """Format a Unix second as an ISO 8601 UTC timestamp, once per distinct second"""
+    return datetime.utcfromtimestamp(second).isoformat()
+
+
+def _format_ips(octets):
+    """Format an (n, 4) array of octets as dotted-quad strings"""
+    return ["%d.%d.%d.%d" % tuple(row) for row in octets.tolist()]
+
+
+def _bulk_external_ips(n):
+    """Draw n public IPv4 addresses from the cumulative range table"""
+    cum = np.array(_PUBLIC_CUM, dtype=np.int64)
+    starts = np.array([start for start, _ in _PUBLIC_RANGES], dtype=np.int64)
+    bases = np.concatenate(([0], cum[:-1]))
+    offsets = np.random.randint(0, _PUBLIC_CUM[-1], size=n, dtype=np.int64)
+    index = np.searchsorted(cum, offsets, side='right')
+    ips = starts[index] + offsets - bases[index]
+    return _format_ips(ips.astype('>u4').view(np.uint8).reshape(-1, 4))
+
+
+def _bulk_internal_ips(n):
+    """Draw n addresses spread evenly over 10/8, 192.168/16 and 172.16/12"""
+    kind = np.random.randint(0, 3, size=n)
+    octets = np.empty((n, 4), dtype=np.int64)
+    octets[:, 0] = np.choose(kind, (10, 192, 172))
+    octets[:, 1] = np.choose(kind, (
+        np.random.randint(0, 256, size=n),
+        np.full(n, 168),
+        np.random.randint(16, 32, size=n)
+    ))
+    octets[:, 2] = np.random.randint(0, 256, size=n)
+    octets[:, 3] = np.random.randint(1, 255, size=n)
+    return _format_ips(octets)
+
+
+class AdaptiveConcurrency:
+    """Limit on in-flight async submissions, tuned from observed latency
+    
+    The limit is revised once per window of `limit` completions, roughly
+    one round trip of the whole pool: if the window's p95 latency stays
+    under the target and every request succeeded, it grows by one; a
+    failure or a p95 above twice the target halves it. Each window starts
+    empty, so one latency spike costs at most one halving. Without a
+    target the limit stays at its starting value.
+    """
+    
+    def __init__(self, start, maximum, target_ms=0):
+        self.limit = max(1, start)
+        self.maximum = max(self.limit, maximum)
+        self.target_ms = target_ms
+        self.in_flight = 0
+        self._latencies = []  # Completions in the current window
+        self._failed = False
+        self._changed = asyncio.Condition()
+    
+    async def acquire(self):
+        """Wait until fewer than `limit` submissions are in flight"""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+    
+    async def release(self, latency_ms, success):
+        """Free a slot and adjust the limit from the finished request"""
+        async with self._changed:
+            self.in_flight -= 1
+            if self.target_ms:
+                self._adjust(latency_ms, success)
+            self._changed.notify_all()
+    
+    def _adjust(self, latency_ms, success):
+        """Record a completion and, once the window is full, grow or halve the limit"""
+        self._latencies.append(latency_ms)
+        self._failed = self._failed or not success
+        if len(self._latencies) < self.limit:
+            return
+        
+        ordered = sorted(self._latencies)
+        p95 = ordered[int(0.95 * (len(ordered) - 1))]
+        if self._failed or p95 > 2 * self.target_ms:
+            self.limit = max(1, self.limit // 2)
+        elif p95 < self.target_ms:
+            self.limit = min(self.maximum, self.limit + 1)
+        self._latencies.clear()
+        self._failed = False
+
 class ThreatSimulator:
     def __init__(self, config=None):
         """Initialize the threat simulator with configuration"""
@@ -109,53 +334,120 @@ class ThreatSimulator:
             "start_time": datetime.now(),
             "by_type": {}
         }
+        
+        # Shared session so keep-alive connections are reused across requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=max(32, self.config["workers"]),
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # (connect, read) timeouts; batch analysis gets a longer read budget
+        self._timeout = (self.config["connect_timeout"], self.config["read_timeout"])
+        self._batch_timeout = (self.config["connect_timeout"], self.config["read_timeout"] * 3)
+        
+        # Submissions are plain JSON POSTs, so they skip the requests layer
+        # (request preparation, hooks, cookies) and go straight to urllib3;
+        # the session above is kept for status polling
+        self._http = urllib3.PoolManager(
+            maxsize=max(32, self.config["workers"]),
+            block=False,
+            retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        )
+        
+        # Optional HTTP/2 client: concurrent submissions multiplex over one
+        # connection instead of each holding its own. HTTP/2 is negotiated
+        # via TLS ALPN, so plain http:// URLs still get HTTP/1.1
+        self._client = None
+        if self.config["http2"]:
+            if HTTP2_AVAILABLE:
+                self._client = httpx.Client(
+                    http2=True,
+                    timeout=httpx.Timeout(self._timeout[1], connect=self._timeout[0]),
+                    limits=httpx.Limits(max_keepalive_connections=10,
+                                        max_connections=max(20, self.config["workers"]))
+                )
+            else:
+                logger.warning("httpx[http2] is not installed; submitting over HTTP/1.1")
+        
+        # Continuous-mode threats waiting to be coalesced into one batch request
+        self._buffer = []
+        self._last_flush = time.monotonic()
+    
+    def close(self):
+        """Release pooled HTTP connections"""
+        self.session.close()
+        self._http.clear()
+        if self._client is not None:
+            self._client.close()
+    
+    def _post_json(self, url, payload, timeout, compress=False):
+        """POST a JSON payload and return (status, body bytes)
+        
+        Goes through the HTTP/2 client when enabled, else the urllib3 pool.
+        
+        With compress set, bodies over GZIP_MIN_BYTES are gzipped at level 1,
+        which keeps most of the ratio on repetitive JSON at a fraction of the
+        CPU cost of the default level.
+        """
+        body = orjson.dumps(payload)
+        headers = JSON_HEADERS
+        if compress and len(body) > GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=1)
+            headers = GZIP_JSON_HEADERS
+        
+        if self._client is not None:
+            response = self._client.post(url, content=body, headers=headers,
+                                         timeout=httpx.Timeout(timeout[1], connect=timeout[0]))
+            return response.status_code, response.content
+        
+        response = self._http.request(
+            "POST", url,
+            body=body,
+            headers=headers,
+            timeout=urllib3.Timeout(connect=timeout[0], read=timeout[1])
+        )
+        return response.status, response.data
     
     def random_ip(self, internal=False):
         """Generate a random IP address"""
         if internal:
             # Generate internal network IPs (10.x.x.x, 192.168.x.x, 172.16-31.x.x)
-            prefix = random.choice([
-                "10.",
-                "192.168.",
-                f"172.{random.randint(16, 31)}."
-            ])
+            # from one 64-bit draw: bits 0-7 and 8-15 are octets, 16-31 give
+            # the host octet (1-254), 32-35 the 172.16/12 second octet and
+            # 36-63 pick the network; the modulo bias on 16+ bits is negligible
+            r = random.getrandbits(64)
+            network = (r >> 36) % 3
+            third = (r >> 8) & 0xFF
+            fourth = ((r >> 16) & 0xFFFF) % 254 + 1
             
-            if prefix.startswith("10."):
-                return f"10.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}"
-            elif prefix.startswith("192.168."):
-                return f"192.168.{random.randint(0, 255)}.{random.randint(1, 254)}"
+            if network == 0:
+                return "10.%d.%d.%d" % (r & 0xFF, third, fourth)
+            elif network == 1:
+                return "192.168.%d.%d" % (third, fourth)
             else:
-                return f"{prefix}{random.randint(0, 255)}.{random.randint(1, 254)}"
+                return "172.%d.%d.%d" % (16 + ((r >> 32) & 0xF), third, fourth)
         else:
-            # Generate external IPs (avoiding private ranges)
-            while True:
-                ip = str(ipaddress.IPv4Address(random.randint(0, 2**32-1)))
-                addr = ipaddress.IPv4Address(ip)
-                # Skip private, loopback, and reserved addresses for external IPs
-                if not (addr.is_private or addr.is_loopback or addr.is_reserved):
-                    return ip
+            # Generate external IPs by sampling the public ranges directly
+            offset = random.randrange(_PUBLIC_CUM[-1])
+            index = bisect.bisect_right(_PUBLIC_CUM, offset)
+            ip = _PUBLIC_RANGES[index][0] + offset - (_PUBLIC_CUM[index - 1] if index else 0)
+            return "%d.%d.%d.%d" % (ip >> 24, (ip >> 16) & 0xFF, (ip >> 8) & 0xFF, ip & 0xFF)
     
     def generate_threat(self, attack_type=None):
         """Generate a single threat of specified or random type"""
         if not attack_type or attack_type not in ATTACK_PATTERNS:
-            attack_type = random.choice(list(ATTACK_PATTERNS.keys()))
+            attack_type = random.choice(_ATTACK_KEYS)
             
-        attack = ATTACK_PATTERNS[attack_type]
-        
         # Common threat data
         destination_ip = self.random_ip(internal=True)
         source_ip = self.random_ip(internal=False)
-        protocol = random.choice(attack["protocols"])
-        
-        # Process additional data
-        additional_data = {}
-        for key, values in attack["additional_data"].items():
-            if callable(values):
-                additional_data[key] = values()
-            elif isinstance(values, list):
-                additional_data[key] = random.choice(values)
-            else:
-                additional_data[key] = values
+        
+        # Protocol and additional data
+        protocol, additional_data = _GEN[attack_type]()
         
         # Create threat data structure
         threat_data = {
@@ -163,29 +455,52 @@ class ThreatSimulator:
             "destination_ip": destination_ip,
             "protocol": protocol,
             "behavior": attack_type,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": _iso_second(int(time.time())),
             "additional_data": additional_data
         }
         
         return threat_data
     
+    def _generate_threats_bulk(self, n):
+        """Generate n random threats, drawing IPs and attack types as NumPy arrays"""
+        attack_types = np.random.choice(_ATTACK_KEYS, size=n).tolist()
+        source_ips = _bulk_external_ips(n)
+        destination_ips = _bulk_internal_ips(n)
+        timestamp = _iso_second(int(time.time()))
+        
+        threats = []
+        for attack_type, source_ip, destination_ip in zip(attack_types, source_ips, destination_ips):
+            protocol, additional_data = _GEN[attack_type]()
+            
+            threats.append({
+                "source_ip": source_ip,
+                "destination_ip": destination_ip,
+                "protocol": protocol,
+                "behavior": attack_type,
+                "timestamp": timestamp,
+                "additional_data": additional_data
+            })
+        
+        return threats
+    
     def send_threat(self, threat_data):
         """Send a single threat to the API and return the result"""
         try:
-            response = requests.post(self.config["api_url"], json=threat_data, timeout=10)
+            status, body = self._post_json(self.config["api_url"], threat_data, self._timeout)
             
-            if response.status_code in (200, 202):
-                print(f"✅ Threat sent: {threat_data['behavior']} from {threat_data['source_ip']}")
-                print(f"   Response: {response.status_code}")
-                print(f"   Details: {json.dumps(response.json(), indent=2)[:200]}...")
+            if status in (200, 202):
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Threat sent: %s from %s (HTTP %d)",
+                                 threat_data['behavior'], threat_data['source_ip'], status)
+                    logger.debug("Details: %.200s", _pretty_json(orjson.loads(body)))
                 return True
             else:
-                print(f"❌ Failed to send threat: {response.status_code}")
-                print(f"   Error: {response.text[:100]}")
+                logger.warning("Failed to send threat: HTTP %d: %.100s", status,
+                               body.decode('utf-8', errors='replace'))
                 return False
                 
         except Exception as e:
-            print(f"❌ Error sending threat: {str(e)}")
+            logger.error("Error sending threat: %s", e)
             return False
     
     def send_batch(self, count=None):
@@ -193,47 +508,237 @@ class ThreatSimulator:
         if not count:
             count = self.config["batch_size"]
             
-        threats = []
-        for _ in range(count):
-            threats.append(self.generate_threat())
-            
+        if NUMPY_AVAILABLE:
+            threats = self._generate_threats_bulk(count)
+        else:
+            threats = [self.generate_threat() for _ in range(count)]
+        
+        result = self._post_batch(threats)
+        if result is None:
+            self.stats["failed_submissions"] += 1
+            return None
+        
+        self.stats["threats_sent"] += count
+        self.stats["successful_submissions"] += 1
+        return result.get("job_id")
+    
+    def _post_batch(self, threats):
+        """Post threats to the batch endpoint and return the response JSON, or None on failure"""
         try:
-            response = requests.post(self.config["batch_url"], json=threats, timeout=30)
+            status, body = self._post_json(self.config["batch_url"], threats, self._batch_timeout,
+                                           compress=self.config["compress_batches"])
             
-            if response.status_code in (200, 202):
-                print(f"✅ Batch of {count} threats sent")
-                print(f"   Response: {response.status_code}")
-                print(f"   Details: {json.dumps(response.json(), indent=2)}")
-                self.stats["threats_sent"] += count
-                self.stats["successful_submissions"] += 1
-                return response.json().get("job_id")
+            if status in (200, 202):
+                result = orjson.loads(body)
+                logger.info("Batch of %d threats sent (HTTP %d)", len(threats), status)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Details: %s", _pretty_json(result))
+                return result
             else:
-                print(f"❌ Failed to send batch: {response.status_code}")
-                print(f"   Error: {response.text[:100]}")
-                self.stats["failed_submissions"] += 1
+                logger.warning("Failed to send batch: HTTP %d: %.100s", status,
+                               body.decode('utf-8', errors='replace'))
                 return None
                 
         except Exception as e:
-            print(f"❌ Error sending batch: {str(e)}")
-            self.stats["failed_submissions"] += 1
+            logger.error("Error sending batch: %s", e)
             return None
     
+    def _flush_buffer(self):
+        """Send buffered continuous-mode threats as one batch request"""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        
+        threats, self._buffer = self._buffer, []
+        success = self._post_batch(threats) is not None
+        for threat in threats:
+            self.record_result(threat, success)
+    
     def check_job_status(self, job_id):
         """Check the status of a batch job"""
         try:
-            status_url = f"{self.config['api_url'].rsplit('/', 1)[0]}/status/{job_id}"
-            response = requests.get(status_url, timeout=10)
+            response = self.session.get(self._status_url(job_id), timeout=self._timeout)
             
             if response.status_code == 200:
-                return response.json()
+                return orjson.loads(response.content)
             else:
-                print(f"❌ Failed to check job status: {response.status_code}")
+                logger.warning("Failed to check job status: HTTP %d", response.status_code)
                 return None
                 
         except Exception as e:
-            print(f"❌ Error checking job status: {str(e)}")
+            logger.error("Error checking job status: %s", e)
             return None
     
+    def _status_url(self, job_id):
+        """Return the status endpoint for a batch job"""
+        return f"{self.config['api_url'].rsplit('/', 1)[0]}/status/{job_id}"
+    
+    def await_job(self, job_id, max_wait=60):
+        """Poll a batch job until it completes or fails, backing off between checks
+        
+        Waits grow exponentially from 0.1 s to 5 s with jitter. When the server
+        sends an ETag, later polls are conditional and a 304 reuses the last
+        status. Returns the last known job status, or None if none was read.
+        """
+        status_url = self._status_url(job_id)
+        deadline = time.monotonic() + max_wait
+        etag = None
+        job = None
+        attempt = 0
+        
+        while True:
+            headers = {"If-None-Match": etag} if etag else None
+            try:
+                response = self.session.get(status_url, headers=headers, timeout=self._timeout)
+            except Exception as e:
+                logger.error("Error checking job status: %s", e)
+                return job
+            
+            if response.status_code == 200:
+                job = orjson.loads(response.content)
+                etag = response.headers.get("ETag")
+            elif response.status_code != 304:
+                logger.warning("Failed to check job status: HTTP %d", response.status_code)
+                return job
+            
+            if job and str(job.get("status", "")).lower() in ("completed", "failed"):
+                return job
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("Job %s still not finished after %d seconds", job_id, max_wait)
+                return job
+            
+            time.sleep(min(remaining, min(5.0, 0.1 * 2 ** attempt) * (0.5 + random.random())))
+            attempt += 1
+    
+    def record_result(self, threat, success):
+        """Update statistics for one submitted threat"""
+        self.stats["threats_sent"] += 1
+        
+        if success:
+            self.stats["successful_submissions"] += 1
+            attack_type = threat["behavior"]
+            if attack_type not in self.stats["by_type"]:
+                self.stats["by_type"][attack_type] = 0
+            self.stats["by_type"][attack_type] += 1
+        else:
+            self.stats["failed_submissions"] += 1
+    
+    async def _send_threat_async(self, session, threat_data):
+        """Send a single threat using an aiohttp session and return the result"""
+        try:
+            async with session.post(self.config["api_url"], data=orjson.dumps(threat_data), headers=JSON_HEADERS,
+                                    timeout=aiohttp.ClientTimeout(sock_connect=self._timeout[0],
+                                                                  sock_read=self._timeout[1])) as response:
+                # Read the body either way so the connection can be reused
+                body = await response.read()
+                if response.status in (200, 202):
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Threat sent: %s from %s (HTTP %d)",
+                                     threat_data['behavior'], threat_data['source_ip'], response.status)
+                        logger.debug("Details: %.200s", _pretty_json(orjson.loads(body)))
+                    return True
+                else:
+                    logger.warning("Failed to send threat: HTTP %d: %.100s", response.status,
+                                   body.decode('utf-8', errors='replace'))
+                    return False
+                    
+        except Exception as e:
+            logger.error("Error sending threat: %s", e)
+            return False
+    
+    async def _send_and_record(self, session, threat, limiter):
+        """Send a threat, record the outcome and free its concurrency slot"""
+        started = time.monotonic()
+        success = False
+        try:
+            success = await self._send_threat_async(session, threat)
+            self.record_result(threat, success)
+        finally:
+            await limiter.release((time.monotonic() - started) * 1000, success)
+    
+    async def run_continuous_async(self, duration_minutes=None, max_threats=None):
+        """Run a continuous simulation with up to `concurrency` requests in flight"""
+        print(f"🚀 Starting continuous threat simulation")
+        print(f"   API endpoint: {self.config['api_url']}")
+        print(f"   Concurrency: {self.config['concurrency']}")
+        if self.config["target_latency_ms"]:
+            print(f"   Adapting concurrency up to {self.config['max_concurrency']} "
+                  f"for a p95 latency of {self.config['target_latency_ms']} ms")
+        
+        count = 0
+        start_time = datetime.now()
+        end_time = None
+        
+        if duration_minutes:
+            end_time = start_time + timedelta(minutes=duration_minutes)
+            print(f"   Will run until: {end_time}")
+        
+        if max_threats:
+            print(f"   Will generate {max_threats} threats")
+        
+        limiter = AdaptiveConcurrency(
+            self.config["concurrency"],
+            self.config["max_concurrency"],
+            self.config["target_latency_ms"]
+        )
+        connector = aiohttp.TCPConnector(limit=max(20, limiter.maximum), keepalive_timeout=30)
+        pending = set()
+        
+        try:
+            async with aiohttp.ClientSession(connector=connector) as session:
+                while True:
+                    # Check if we should stop
+                    if max_threats and count >= max_threats:
+                        break
+                        
+                    if end_time and datetime.now() >= end_time:
+                        break
+                    
+                    # Wait for a free slot, then send without blocking the schedule
+                    await limiter.acquire()
+                    threat = self.generate_threat()
+                    task = asyncio.create_task(self._send_and_record(session, threat, limiter))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                    count += 1
+                    
+                    # Wait before next threat
+                    sleep_time = random.randint(
+                        self.config["interval_min"], 
+                        self.config["interval_max"]
+                    )
+                    logger.debug("Waiting %d seconds before next threat", sleep_time)
+                    await asyncio.sleep(sleep_time)
+                
+                # Let in-flight submissions finish before closing the session
+                await asyncio.gather(*pending)
+                
+        except asyncio.CancelledError:
+            print("\n⚠️  Simulation interrupted by user")
+        
+        if self.config["target_latency_ms"]:
+            print(f"   Final concurrency: {limiter.limit}")
+        
+        # Print final stats
+        self.print_stats()
+    
+    def send_concurrent(self, count, attack_type=None):
+        """Send count threats at once, overlapping requests across worker threads"""
+        workers = self.config["workers"]
+        threats = [self.generate_threat(attack_type) for _ in range(count)]
+        print(f"🚀 Sending {count} threats with {workers} workers")
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.send_threat, threat): threat for threat in threats}
+            for done, future in enumerate(as_completed(futures), 1):
+                self.record_result(futures[future], future.result())
+                if done % 100 == 0 or done == count:
+                    print(f"   Progress: {done}/{count}")
+        
+        self.print_stats()
+    
     def run_continuous(self, duration_minutes=None, max_threats=None):
         """Run a continuous simulation for a specified duration or count"""
         print(f"🚀 Starting continuous threat simulation")
@@ -259,34 +764,33 @@ class ThreatSimulator:
                 if end_time and datetime.now() >= end_time:
                     break
                 
-                # Generate and send a threat
+                # Generate and send a threat, or buffer it for the next batch
                 threat = self.generate_threat()
-                success = self.send_threat(threat)
-                
-                # Update stats
                 count += 1
-                self.stats["threats_sent"] += 1
                 
-                if success:
-                    self.stats["successful_submissions"] += 1
-                    attack_type = threat["behavior"]
-                    if attack_type not in self.stats["by_type"]:
-                        self.stats["by_type"][attack_type] = 0
-                    self.stats["by_type"][attack_type] += 1
+                if self.config["batch_threshold"]:
+                    self._buffer.append(threat)
+                    flush_due = (time.monotonic() - self._last_flush) * 1000 >= self.config["flush_interval_ms"]
+                    if len(self._buffer) >= self.config["batch_threshold"] or flush_due:
+                        self._flush_buffer()
                 else:
-                    self.stats["failed_submissions"] += 1
+                    success = self.send_threat(threat)
+                    self.record_result(threat, success)
                 
                 # Wait before next threat
                 sleep_time = random.randint(
                     self.config["interval_min"], 
                     self.config["interval_max"]
                 )
-                print(f"⏱️  Waiting {sleep_time} seconds before next threat...")
+                logger.debug("Waiting %d seconds before next threat", sleep_time)
                 time.sleep(sleep_time)
                 
         except KeyboardInterrupt:
             print("\n⚠️  Simulation interrupted by user")
         
+        # Send whatever is still buffered
+        self._flush_buffer()
+        
         # Print final stats
         self.print_stats()
     
@@ -328,34 +832,97 @@ def main():
                         type=int)
     parser.add_argument("--count", help="Number of threats to generate", 
                         type=int, default=1)
+    parser.add_argument("--concurrency", help="Maximum concurrent requests in continuous mode",
+                        type=int, default=DEFAULT_CONFIG["concurrency"])
+    parser.add_argument("--target-latency-ms", help="Adapt continuous-mode concurrency to keep p95 latency under this target (0 disables)",
+                        type=int, default=DEFAULT_CONFIG["target_latency_ms"])
+    parser.add_argument("--max-concurrency", help="Upper bound for adaptive concurrency",
+                        type=int, default=DEFAULT_CONFIG["max_concurrency"])
+    parser.add_argument("--connect-timeout", help="Seconds to wait for a connection to the API",
+                        type=float, default=DEFAULT_CONFIG["connect_timeout"])
+    parser.add_argument("--read-timeout", help="Seconds to wait for an API response (tripled for batches)",
+                        type=float, default=DEFAULT_CONFIG["read_timeout"])
+    parser.add_argument("--workers", help="Send --count threats concurrently from this many threads, without waiting between them",
+                        type=int, default=DEFAULT_CONFIG["workers"])
+    parser.add_argument("--batch-threshold", help="Coalesce continuous-mode threats into batches of this size (0 disables; not with --concurrency or --target-latency-ms)",
+                        type=int, default=DEFAULT_CONFIG["batch_threshold"])
+    parser.add_argument("--flush-interval-ms", help="Send a partial batch once this many milliseconds have passed",
+                        type=int, default=DEFAULT_CONFIG["flush_interval_ms"])
+    parser.add_argument("--compress-batches", help="Gzip large batch bodies (the API must accept Content-Encoding: gzip)",
+                        action="store_true")
+    parser.add_argument("--http2", help="Submit over HTTP/2 with httpx (needs httpx[http2] and an https:// API URL)",
+                        action="store_true")
+    parser.add_argument("--wait", help="In batch mode, wait up to this many seconds for the job to finish",
+                        type=int, default=0)
+    parser.add_argument("--verbose", help="Log every submission and its response",
+                        action="store_true")
     parser.add_argument("--attack-type", help="Specific attack type to simulate",
                         choices=ATTACK_PATTERNS.keys())
     
     args = parser.parse_args()
     
+    # Buffering is only implemented for the sequential continuous loop
+    if args.batch_threshold and (args.concurrency > 1 or args.target_latency_ms):
+        parser.error("--batch-threshold cannot be combined with --concurrency or --target-latency-ms")
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    # httpx logs every request at INFO; --verbose covers that already
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if args.verbose:
+        logger.setLevel(logging.DEBUG)
+    
     config = {
         "api_url": args.url,
         "batch_url": args.batch_url,
         "interval_min": args.min_interval,
         "interval_max": args.max_interval,
-        "batch_size": args.batch_size
+        "batch_size": args.batch_size,
+        "concurrency": args.concurrency,
+        "workers": args.workers,
+        "target_latency_ms": args.target_latency_ms,
+        "max_concurrency": args.max_concurrency,
+        "connect_timeout": args.connect_timeout,
+        "read_timeout": args.read_timeout,
+        "compress_batches": args.compress_batches,
+        "http2": args.http2,
+        "batch_threshold": args.batch_threshold,
+        "flush_interval_ms": args.flush_interval_ms
     }
     
     simulator = ThreatSimulator(config)
     
-    if args.continuous:
-        simulator.run_continuous(args.duration, args.count)
-    elif args.batch:
-        simulator.send_batch(args.count)
-    else:
-        # Single threat mode
-        for _ in range(args.count):
-            threat = simulator.generate_threat(args.attack_type)
-            simulator.send_threat(threat)
-            if args.count > 1 and _ < args.count - 1:
-                sleep_time = random.randint(args.min_interval, args.max_interval)
-                print(f"⏱️  Waiting {sleep_time} seconds before next threat...")
-                time.sleep(sleep_time)
+    try:
+        if args.continuous and (args.concurrency > 1 or args.target_latency_ms):
+            try:
+                asyncio.run(simulator.run_continuous_async(args.duration, args.count))
+            except KeyboardInterrupt:
+                pass
+        elif args.continuous:
+            simulator.run_continuous(args.duration, args.count)
+        elif args.batch:
+            job_id = simulator.send_batch(args.count)
+            if job_id and args.wait:
+                job = simulator.await_job(job_id, args.wait)
+                if job:
+                    print(f"📋 Job {job_id}: {job.get('status')} "
+                          f"({job.get('completed', 0)}/{job.get('total', 0)} threats analyzed)")
+        elif args.workers > 1:
+            simulator.send_concurrent(args.count, args.attack_type)
+        else:
+            # Single threat mode
+            for _ in range(args.count):
+                threat = simulator.generate_threat(args.attack_type)
+                simulator.record_result(threat, simulator.send_threat(threat))
+                if args.count > 1 and _ < args.count - 1:
+                    sleep_time = random.randint(args.min_interval, args.max_interval)
+                    logger.debug("Waiting %d seconds before next threat", sleep_time)
+                    time.sleep(sleep_time)
+            simulator.print_stats()
+    finally:
+        simulator.close()
     
     print("✨ Simulation complete")
 